@@ -12,46 +12,115 @@ import librosa
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from typing import Optional, Tuple, List, Dict
+import torchaudio
+from torchvision.ops import roi_align
+import soundfile
+from typing import Optional, Tuple, List, Dict, Iterable, Iterator, Union
 import os
+import subprocess
+import itertools
+import queue
+import threading
+import hashlib
+import copy
 from pathlib import Path
 import json
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import torch_tensorrt
+except ImportError:
+    torch_tensorrt = None
+
+try:
+    from torch._inductor import aoti_compile_and_package, aoti_load_package
+except ImportError:
+    aoti_compile_and_package = aoti_load_package = None
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback when numba is not installed: leave the function as plain Python"""
+        return lambda func: func
+
+# Compiled inference artifacts (TensorRT engines, AOTInductor packages) are cached here across runs
+MODEL_CACHE_DIR = Path.home() / '.cache' / 'omnisync'
+
 class AudioProcessor:
     """Handle audio processing and feature extraction"""
     
-    def __init__(self, sample_rate: int = 16000):
+    def __init__(self, sample_rate: int = 16000, device: Optional[torch.device] = None):
         self.sample_rate = sample_rate
+        self.device = device or torch.device('cpu')
         
-    def load_audio(self, audio_path: str) -> np.ndarray:
-        """Load and preprocess audio file"""
-        audio, sr = librosa.load(audio_path, sr=self.sample_rate)
+        # STFT settings follow librosa's defaults (2048-point FFT, hop 512, Slaney mel filters)
+        self.n_fft = 2048
+        self.hop_length = 512
+        mel_kwargs = {
+            'n_fft': self.n_fft, 'hop_length': self.hop_length,
+            'norm': 'slaney', 'mel_scale': 'slaney'
+        }
+        self.window = torch.hann_window(self.n_fft, device=self.device)
+        self.mfcc_transform = torchaudio.transforms.MFCC(
+            sample_rate=sample_rate, n_mfcc=13, melkwargs={**mel_kwargs, 'n_mels': 128}
+        ).to(self.device)
+        self.mel_transform = torchaudio.transforms.MelSpectrogram(
+            sample_rate=sample_rate, n_mels=80, **mel_kwargs
+        ).to(self.device)
+        self.spectrogram_transform = torchaudio.transforms.Spectrogram(
+            n_fft=self.n_fft, hop_length=self.hop_length
+        ).to(self.device)
+        self.chroma_filters = torch.from_numpy(
+            librosa.filters.chroma(sr=sample_rate, n_fft=self.n_fft)
+        ).to(self.device)
+        # Resampling kernels, built once per source sample rate
+        self.resamplers = {}
+        
+    def load_audio(self, audio_path: str) -> torch.Tensor:
+        """Load audio file as a mono waveform on the processing device"""
+        try:
+            audio, sr = soundfile.read(audio_path, dtype='float32', always_2d=True)
+            # Downmix on the host so only one channel is uploaded, then resample on the device
+            audio = audio.mean(axis=1)
+        except RuntimeError:
+            # libsndfile can't read every format (e.g. m4a/AAC); librosa falls back to audioread
+            audio, sr = librosa.load(audio_path, sr=None, mono=True)
+        
+        audio = torch.from_numpy(audio).to(self.device)
+        if sr != self.sample_rate:
+            if sr not in self.resamplers:
+                self.resamplers[sr] = torchaudio.transforms.Resample(sr, self.sample_rate).to(self.device)
+            audio = self.resamplers[sr](audio)
         return audio
     
-    def extract_audio_features(self, audio: np.ndarray) -> Dict[str, np.ndarray]:
-        """Extract audio features for lip-sync"""
+    def extract_audio_features(self, audio: torch.Tensor) -> Dict[str, torch.Tensor]:
+        """Extract audio features for lip-sync, keeping them on the processing device"""
+        audio = torch.as_tensor(audio, dtype=torch.float32, device=self.device)
+        
         # Mel-frequency cepstral coefficients
-        mfcc = librosa.feature.mfcc(y=audio, sr=self.sample_rate, n_mfcc=13)
+        mfcc = self.mfcc_transform(audio)
         
         # Mel spectrogram
-        mel_spec = librosa.feature.melspectrogram(
-            y=audio, sr=self.sample_rate, n_mels=80
-        )
+        mel_spec = self.mel_transform(audio)
         
-        # Chroma features
-        chroma = librosa.feature.chroma(y=audio, sr=self.sample_rate)
+        # Chroma features (chroma filter bank over the power spectrum, max-normalised per frame)
+        chroma = self.chroma_filters @ self.spectrogram_transform(audio)
+        chroma = chroma / chroma.amax(dim=0, keepdim=True).clamp_min(torch.finfo(chroma.dtype).tiny)
         
         # Spectral centroid
-        spectral_centroid = librosa.feature.spectral_centroid(y=audio, sr=self.sample_rate)
+        spectral_centroid = torchaudio.functional.spectral_centroid(
+            audio, self.sample_rate, pad=0, window=self.window,
+            n_fft=self.n_fft, hop_length=self.hop_length, win_length=self.n_fft
+        ).unsqueeze(0)
         
         return {
             'mfcc': mfcc,
             'mel_spectrogram': mel_spec,
             'chroma': chroma,
             'spectral_centroid': spectral_centroid,
-            'audio_length': len(audio) / self.sample_rate
+            'audio_length': audio.shape[-1] / self.sample_rate
         }
 
 class FaceDetector:
@@ -64,44 +133,148 @@ class FaceDetector:
             'opencv_face_detector.pbtxt'
         ) if os.path.exists('opencv_face_detector_uint8.pb') else None
         
+        # Load the Haar cascade fallback once rather than re-parsing its XML on every frame
+        self.face_cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+        
     def detect_face(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
         """Detect face in frame and return bounding box"""
         if self.face_net is None:
             # Fallback to Haar cascade if DNN model not available
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-            return faces[0] if len(faces) > 0 else None
+            # Detect at half resolution (4x fewer pixels) and scale the box back up
+            gray = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            return tuple(int(v) * 2 for v in faces[0]) if len(faces) > 0 else None
         
         # DNN-based face detection
-        h, w = frame.shape[:2]
-        blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), [104, 117, 123])
-        self.face_net.setInput(blob)
-        detections = self.face_net.forward()
-        
-        for i in range(detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
-            if confidence > 0.5:
-                x1 = int(detections[0, 0, i, 3] * w)
-                y1 = int(detections[0, 0, i, 4] * h)
-                x2 = int(detections[0, 0, i, 5] * w)
-                y2 = int(detections[0, 0, i, 6] * h)
-                return (x1, y1, x2 - x1, y2 - y1)
+        return self.detect_faces_batch([frame])[0]
+    
+    def detect_faces_batch(self, frames: List[np.ndarray], batch_size: int = 32) -> List[Optional[Tuple[int, int, int, int]]]:
+        """Detect faces in a list of frames with one DNN forward pass per batch"""
+        if self.face_net is None:
+            # Haar cascade has no batched API, detect frame by frame
+            return [self.detect_face(frame) for frame in frames]
         
-        return None
+        bboxes = []
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            blob = cv2.dnn.blobFromImages(batch, 1.0, (300, 300), [104, 117, 123])
+            self.face_net.setInput(blob)
+            # Shape (1, 1, N*K, 7), column 0 is the image index within the batch
+            detections = self.face_net.forward()[0, 0]
+            
+            batch_bboxes = [None] * len(batch)
+            for detection in detections:
+                image_idx = int(detection[0])
+                confidence = detection[2]
+                # Keep the first confident detection per image, as detect_face does
+                if not 0 <= image_idx < len(batch) or batch_bboxes[image_idx] is not None:
+                    continue
+                if confidence > 0.5:
+                    h, w = batch[image_idx].shape[:2]
+                    x1 = int(detection[3] * w)
+                    y1 = int(detection[4] * h)
+                    x2 = int(detection[5] * w)
+                    y2 = int(detection[6] * h)
+                    batch_bboxes[image_idx] = (x1, y1, x2 - x1, y2 - y1)
+            
+            bboxes.extend(batch_bboxes)
+        
+        return bboxes
     
     def extract_lip_region(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> np.ndarray:
         """Extract lip region from detected face"""
-        x, y, w, h = face_bbox
+        x1, y1, x2, y2 = self.lip_boxes(np.array([face_bbox]), frame.shape[:2])[0]
+        return frame[y1:y2, x1:x2]
+    
+    @staticmethod
+    def lip_boxes(face_bboxes: np.ndarray, frame_size: Tuple[int, int]) -> np.ndarray:
+        """Lip regions as (x1, y1, x2, y2) rows for an (N, 4) array of x/y/w/h face boxes"""
+        x, y, w, h = np.asarray(face_bboxes, dtype=np.int64).T
         # Approximate lip region (bottom third of face)
-        lip_y = y + int(h * 0.67)
-        lip_h = int(h * 0.33)
-        lip_x = x + int(w * 0.2)
-        lip_w = int(w * 0.6)
+        lip_y = y + (h * 0.67).astype(np.int64)
+        lip_h = (h * 0.33).astype(np.int64)
+        lip_x = x + (w * 0.2).astype(np.int64)
+        lip_w = (w * 0.6).astype(np.int64)
+        
+        # Clip to the frame so boxes partly outside it crop only the visible part
+        frame_h, frame_w = frame_size
+        boxes = np.stack([lip_x, lip_y, lip_x + lip_w, lip_y + lip_h], axis=1)
+        boxes[:, 0::2] = boxes[:, 0::2].clip(0, frame_w)
+        boxes[:, 1::2] = boxes[:, 1::2].clip(0, frame_h)
+        return boxes
+
+class KeyframeFaceTracker:
+    """Run face detection on keyframes only and interpolate bounding boxes in between"""
+    
+    def __init__(self, face_detector: FaceDetector, keyframe_interval: int = 5, diff_threshold: float = 12.0):
+        self.face_detector = face_detector
+        self.keyframe_interval = keyframe_interval
+        self.diff_threshold = diff_threshold
+        self.reset()
+    
+    def reset(self, start_idx: int = 0):
+        """Forget the previous keyframe, e.g. when a new stream starts"""
+        self.next_frame_idx = start_idx
+        self.last_anchor = None
+        self.anchor_frame = None
+        
+    def track(self, frames: Union[List[np.ndarray], np.ndarray], start_idx: int) -> List[Optional[Tuple[int, int, int, int]]]:
+        """Return a face bounding box for each of a run of consecutive frames starting at start_idx"""
+        if start_idx != self.next_frame_idx:
+            self.reset(start_idx)
+        if len(frames) == 0:
+            return []
+        
+        # Keyframes: every keyframe_interval-th frame, frames that moved away from the last keyframe,
+        # and the last frame so frames at the end of the batch always have an anchor to interpolate to
+        keyframe_offsets = []
+        for offset, frame in enumerate(frames):
+            if ((start_idx + offset) % self.keyframe_interval == 0
+                    or offset == len(frames) - 1
+                    or self.anchor_frame is None
+                    or self._frame_difference(frame, self.anchor_frame) > self.diff_threshold):
+                keyframe_offsets.append(offset)
+                self.anchor_frame = frame
         
-        return frame[lip_y:lip_y+lip_h, lip_x:lip_x+lip_w]
+        keyframe_bboxes = self.face_detector.detect_faces_batch(
+            [frames[offset] for offset in keyframe_offsets], batch_size=len(keyframe_offsets)
+        )
+        
+        bboxes = []
+        prev_anchor = self.last_anchor
+        next_key = 0
+        for offset in range(len(frames)):
+            frame_idx = start_idx + offset
+            next_anchor = (start_idx + keyframe_offsets[next_key], keyframe_bboxes[next_key])
+            if offset == keyframe_offsets[next_key]:
+                prev_anchor = next_anchor
+                bboxes.append(next_anchor[1])
+                next_key += 1
+            else:
+                bboxes.append(self._interpolate(prev_anchor, next_anchor, frame_idx))
+        
+        self.last_anchor = prev_anchor
+        self.next_frame_idx = start_idx + len(frames)
+        return bboxes
+    
+    @staticmethod
+    def _frame_difference(frame: np.ndarray, other: np.ndarray) -> float:
+        """Mean absolute pixel difference, estimated on a 4x subsampled grid"""
+        return float(np.abs(frame[::4, ::4].astype(np.int16) - other[::4, ::4]).mean())
+    
+    @staticmethod
+    def _interpolate(prev_anchor: Tuple, next_anchor: Tuple, frame_idx: int) -> Optional[Tuple[int, int, int, int]]:
+        """Linearly interpolate x/y/w/h between two (frame_idx, bbox) keyframe anchors"""
+        (prev_idx, prev_bbox), (next_idx, next_bbox) = prev_anchor, next_anchor
+        if prev_bbox is None or next_bbox is None:
+            # No face to blend with on one side, so reuse the nearer keyframe's result
+            return prev_bbox if frame_idx - prev_idx <= next_idx - frame_idx else next_bbox
+        
+        t = (frame_idx - prev_idx) / (next_idx - prev_idx)
+        return tuple(int(round(p + (n - p) * t)) for p, n in zip(prev_bbox, next_bbox))
 
 class SimpleLipSyncModel(nn.Module):
     """Simplified neural network for lip-sync generation"""
@@ -128,15 +301,16 @@ class SimpleLipSyncModel(nn.Module):
             nn.Conv2d(64, 128, 3, padding=1),
             nn.ReLU(),
             nn.MaxPool2d(2),
-            nn.AdaptiveAvgPool2d((8, 8)),
-            nn.Flatten(),
-            nn.Linear(128 * 8 * 8, visual_dim)
+            # Global pool + 1x1 conv projection (128 -> visual_dim weights instead of 8192 -> visual_dim)
+            nn.AdaptiveAvgPool2d(1),
+            nn.Conv2d(128, visual_dim, 1),
+            nn.Flatten()
         )
         
-        # Fusion and decoder
+        # Fusion and decoder; Linear(concat(a, v)) is split into La(a) + Lv(v) to avoid the concat
+        self.fusion_audio = nn.Linear(512, 1024)
+        self.fusion_visual = nn.Linear(visual_dim, 1024, bias=False)
         self.fusion = nn.Sequential(
-            nn.Linear(512 + visual_dim, 1024),
-            nn.ReLU(),
             nn.Linear(1024, 512),
             nn.ReLU()
         )
@@ -154,79 +328,358 @@ class SimpleLipSyncModel(nn.Module):
         visual_encoded = self.visual_encoder(visual_features)
         
         # Fuse features
-        fused = torch.cat([audio_encoded, visual_encoded], dim=1)
+        fused = F.relu(self.fusion_audio(audio_encoded) + self.fusion_visual(visual_encoded))
         fused = self.fusion(fused)
         
         # Generate output
         output = self.decoder(fused)
         return output
 
+@njit(cache=True, fastmath=True)
+def guidance_strength(base_strength: float, audio_power: float, frame_idx: int, total_frames: int) -> float:
+    """Guidance strength for a single frame, JIT-compiled to skip Python float overhead"""
+    return base_strength * (1.0 - abs(frame_idx / total_frames - 0.5) * 0.3) * min(audio_power * 2.0, 1.0)
+
 class DynamicGuidanceSystem:
     """Simplified version of Dynamic Spatiotemporal Classifier-Free Guidance"""
     
     def __init__(self, base_strength: float = 0.7):
         self.base_strength = base_strength
         
-    def compute_guidance_strength(self, audio_power: float, frame_idx: int, total_frames: int) -> float:
-        """Compute adaptive guidance strength based on audio and temporal context"""
+    def compute_guidance_strength(self, audio_power: Union[float, np.ndarray], frame_idx: Union[int, np.ndarray],
+                                  total_frames: int) -> Union[float, np.ndarray]:
+        """Compute adaptive guidance strength based on audio and temporal context, per frame or for whole arrays"""
+        if np.ndim(audio_power) == 0 and np.ndim(frame_idx) == 0:
+            # Per-frame calls go through the JIT-compiled scalar kernel
+            return guidance_strength(self.base_strength, float(audio_power), int(frame_idx), int(total_frames))
+        
         # Temporal weighting (stronger guidance at speech peaks)
-        temporal_weight = 1.0 - abs(frame_idx / total_frames - 0.5) * 0.3
+        temporal_weight = 1.0 - np.abs(np.asarray(frame_idx) / total_frames - 0.5) * 0.3
         
         # Audio power weighting
-        audio_weight = min(audio_power * 2.0, 1.0)
+        audio_weight = np.minimum(np.asarray(audio_power) * 2.0, 1.0)
         
         return self.base_strength * temporal_weight * audio_weight
 
+class FrameBlockPool:
+    """Fixed set of reusable (batch_size, H, W, 3) uint8 frame blocks cycled from the decoder to the encoder and back"""
+    
+    def __init__(self, num_blocks: int, block_shape: Tuple[int, int, int, int]):
+        self.free_blocks = queue.Queue()
+        for _ in range(num_blocks):
+            self.free_blocks.put(np.empty(block_shape, np.uint8))
+        self.closed = threading.Event()
+    
+    def acquire(self) -> Optional[np.ndarray]:
+        """Wait for a free block, or return None once the pool is closed"""
+        while not self.closed.is_set():
+            try:
+                return self.free_blocks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+    
+    def release(self, block: np.ndarray):
+        """Hand a block, or a leading slice of one, back for the decoder to fill again"""
+        self.free_blocks.put(block if block.base is None else block.base)
+    
+    def recycle(self, blocks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Yield blocks, releasing each one once the consumer asks for the next"""
+        for block in blocks:
+            yield block
+            self.release(block)
+    
+    def close(self):
+        """Wake a decoder waiting in acquire so it can stop, e.g. after another stage failed"""
+        self.closed.set()
+
 class OmniSyncFramework:
     """Main OmniSync framework"""
     
-    def __init__(self, model_path: Optional[str] = None):
-        self.audio_processor = AudioProcessor()
+    def __init__(self, model_path: Optional[str] = None, batch_size: int = 32, max_buffered_frames: int = 96):
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.batch_size = batch_size
+        # Cap on decoded frames alive across all pipeline stages; 3 * batch_size lets decode,
+        # inference and encode each work on their own block
+        self.max_buffered_frames = max_buffered_frames
+        # Side stream for host-to-device copies so they overlap queued compute
+        self.copy_stream = torch.cuda.Stream() if self.device.type == 'cuda' else None
+        # Small ring of reusable pinned staging buffers for lip window uploads, with the
+        # event marking when each slot's last copy finished
+        self.staging_buffers = [None, None]
+        self.staging_events = [None, None]
+        self.staging_slot = 0
+        # Result of the one-off NVENC probe in _nvenc_available, None until probed
+        self.nvenc_works = None
+        self.audio_processor = AudioProcessor(device=self.device)
         self.face_detector = FaceDetector()
-        self.model = SimpleLipSyncModel()
+        self.face_tracker = KeyframeFaceTracker(self.face_detector)
+        self.model = SimpleLipSyncModel().to(self.device)
+        # NHWC conv weights match the channels_last visual inputs built in lip_sync_batch
+        self.model.visual_encoder.to(memory_format=torch.channels_last)
         self.guidance_system = DynamicGuidanceSystem()
         
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
+        else:
+            self._build_inference_model()
     
     def load_model(self, model_path: str):
         """Load pre-trained model"""
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
+        state_dict = torch.load(model_path, map_location=self.device)
+        self.model.load_state_dict(self._upgrade_state_dict(state_dict))
+        self.model.eval()
+        self._build_inference_model()
+    
+    @staticmethod
+    def _upgrade_state_dict(state_dict: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """Map checkpoints saved with the concat fusion layer onto fusion_audio/fusion_visual"""
+        if 'fusion.2.weight' not in state_dict:
+            return state_dict
+        
+        # Old layout: fusion.0 = Linear(512 + visual_dim, 1024), fusion.2 = Linear(1024, 512)
+        state_dict = dict(state_dict)
+        fusion_weight = state_dict.pop('fusion.0.weight')
+        state_dict['fusion_audio.weight'] = fusion_weight[:, :512]
+        state_dict['fusion_visual.weight'] = fusion_weight[:, 512:]
+        state_dict['fusion_audio.bias'] = state_dict.pop('fusion.0.bias')
+        state_dict['fusion.0.weight'] = state_dict.pop('fusion.2.weight')
+        state_dict['fusion.0.bias'] = state_dict.pop('fusion.2.bias')
+        return state_dict
+    
+    def _build_inference_model(self):
+        """Compile the model for inference and pay the compile cost up front"""
         self.model.eval()
+        audio_example, visual_example = self._example_inputs()
+        
+        # TensorRT engines and AOT packages bake in FP16 themselves; only torch.compile needs autocast
+        use_cuda = self.device.type == 'cuda'
+        self.use_autocast = False
+        self.inference_dtype = torch.float32
+        if use_cuda and torch_tensorrt is not None:
+            cache_path = self._artifact_path(
+                'trt', '.ep', torch_tensorrt.__version__, torch.cuda.get_device_name(self.device)
+            )
+            if self._build_from_artifact('TensorRT', self._compile_tensorrt, cache_path,
+                                         audio_example, visual_example):
+                return
+        
+        if aoti_compile_and_package is not None:
+            self.inference_dtype = torch.float16 if use_cuda else torch.float32
+            cache_path = self._artifact_path('aoti', '.pt2', torch.__version__, self._device_key())
+            if self._build_from_artifact('AOTInductor', self._compile_aot, cache_path,
+                                         audio_example, visual_example):
+                return
+            self.inference_dtype = torch.float32
+        
+        self._compile_dynamic(audio_example, visual_example)
+    
+    def _build_from_artifact(self, backend: str, compile_fn, cache_path: Path,
+                             audio_example: torch.Tensor, visual_example: torch.Tensor) -> bool:
+        """Load or compile inference_model with compile_fn and warm it up, returning False if any step fails"""
+        try:
+            self.inference_model = compile_fn(cache_path, audio_example, visual_example)
+            # Warm up with the fixed (batch_size, ...) shapes run_model_batched always feeds
+            self.run_model_batched(audio_example, visual_example)
+            return True
+        except Exception as error:
+            print(f"{backend} compilation failed ({error}), falling back")
+            # Drop the artifact so a stale or corrupt file doesn't fail the same way on every start
+            cache_path.unlink(missing_ok=True)
+            self.inference_model = None
+            return False
+    
+    def _compile_dynamic(self, audio_example: torch.Tensor, visual_example: torch.Tensor):
+        """Compile with torch.compile under autocast, dropping to eager mode if compilation fails"""
+        self.use_autocast = self.device.type == 'cuda'
+        # Persist compiled kernels so later processes skip most of the compile work
+        os.environ.setdefault(
+            'TORCHINDUCTOR_CACHE_DIR', str(Path.home() / '.cache' / 'torch' / 'inductor')
+        )
+        self.inference_model = torch.compile(self.model, mode='reduce-overhead', fullgraph=True)
+        
+        # torch.compile is lazy, so the warm-up run is where compilation actually happens
+        try:
+            self.run_model_batched(audio_example, visual_example)
+        except Exception as error:
+            print(f"torch.compile failed ({error}), running the model eagerly")
+            self.inference_model = self.model
+    
+    def _device_key(self) -> str:
+        """Name the device, and on CUDA its architecture, that compiled kernels are built for"""
+        if self.device.type != 'cuda':
+            return str(self.device)
+        capability = torch.cuda.get_device_capability(self.device)
+        return f'{torch.cuda.get_device_name(self.device)} sm{capability}'
+    
+    def _example_inputs(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Inputs with the fixed shapes and layout run_model_batched feeds the model"""
+        audio_example = torch.zeros(self.batch_size, self.model.audio_dim, device=self.device)
+        visual_example = torch.zeros(self.batch_size, 3, 64, 64, device=self.device).contiguous(
+            memory_format=torch.channels_last
+        )
+        return audio_example, visual_example
+    
+    def _compile_tensorrt(self, cache_path: Path, audio_example: torch.Tensor,
+                          visual_example: torch.Tensor) -> nn.Module:
+        """Compile the model to an FP16 TensorRT engine, reusing the engine cached at cache_path when one exists"""
+        if cache_path.exists():
+            return torch_tensorrt.load(str(cache_path)).module()
+        
+        inputs = [audio_example, visual_example]
+        trt_model = torch_tensorrt.compile(
+            self.model, ir='dynamo', inputs=inputs, enabled_precisions={torch.half}
+        )
+        self._write_artifact(cache_path, lambda path: torch_tensorrt.save(trt_model, path, inputs=inputs))
+        return trt_model
+    
+    def _compile_aot(self, cache_path: Path, audio_example: torch.Tensor, visual_example: torch.Tensor):
+        """Export the model with torch.export and AOTInductor, reusing the package cached at cache_path"""
+        if not cache_path.exists():
+            # Export a copy in the inference dtype so FP16 weights are baked into the CUDA package
+            export_model = copy.deepcopy(self.model).to(self.inference_dtype)
+            example_inputs = (audio_example.to(self.inference_dtype), visual_example.to(self.inference_dtype))
+            exported = torch.export.export(export_model, example_inputs)
+            self._write_artifact(
+                cache_path, lambda path: aoti_compile_and_package(exported, package_path=path)
+            )
+        
+        # Loading the package skips TorchDynamo tracing and Inductor compilation entirely
+        return aoti_load_package(str(cache_path))
+    
+    def _artifact_path(self, kind: str, suffix: str, *key_parts: str) -> Path:
+        """Cache path for a compiled artifact, keyed on the model weights, batch size and key_parts"""
+        digest = hashlib.sha1()
+        for part in key_parts:
+            digest.update(part.encode())
+        for name, tensor in self.model.state_dict().items():
+            digest.update(name.encode())
+            digest.update(tensor.detach().cpu().numpy().tobytes())
+        
+        return MODEL_CACHE_DIR / f'{kind}_b{self.batch_size}_{digest.hexdigest()[:16]}{suffix}'
+    
+    @staticmethod
+    def _write_artifact(cache_path: Path, write):
+        """Call write with a temporary path next to cache_path, then move the result into place atomically"""
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Keep the suffix so writers that check it still accept the path
+        tmp_path = cache_path.with_name(f'{cache_path.stem}.tmp-{os.getpid()}{cache_path.suffix}')
+        try:
+            write(str(tmp_path))
+            # A crash mid-write or a concurrent process never leaves a partial artifact at cache_path
+            os.replace(tmp_path, cache_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
     
     def save_model(self, model_path: str):
         """Save trained model"""
         torch.save(self.model.state_dict(), model_path)
     
-    def preprocess_video(self, video_path: str) -> List[np.ndarray]:
-        """Extract frames from video"""
-        cap = cv2.VideoCapture(video_path)
-        frames = []
+    def probe_video(self, video_path: str) -> Dict:
+        """Read frame size, frame rate and frame count of the first video stream"""
+        stream = self._probe_stream(video_path, 'nb_frames')
+        if stream is None:
+            raise ValueError(f"No video stream found in {video_path}")
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frames.append(frame)
+        # nb_frames comes from the container header; only count packets (a full demux pass) without it
+        nb_frames = str(stream.get('nb_frames', ''))
+        frame_count = int(nb_frames) if nb_frames.isdigit() else 0
+        if frame_count == 0:
+            counted = self._probe_stream(video_path, 'nb_read_packets', '-count_packets')
+            frame_count = int(counted['nb_read_packets'])
         
-        cap.release()
-        return frames
+        fps_num, fps_den = (float(x) for x in stream['avg_frame_rate'].split('/'))
+        
+        return {
+            'width': int(stream['width']),
+            'height': int(stream['height']),
+            'fps': fps_num / fps_den if fps_num and fps_den else 25.0,
+            'frame_count': frame_count
+        }
+    
+    @staticmethod
+    def _probe_stream(video_path: str, count_entry: str, *extra_args: str) -> Optional[Dict]:
+        """Run ffprobe on the first video stream, returning its entries or None without a video stream"""
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'v:0', *extra_args,
+             '-show_entries', f'stream=width,height,avg_frame_rate,{count_entry}',
+             '-of', 'json', video_path],
+            capture_output=True, text=True, check=True
+        )
+        streams = json.loads(result.stdout).get('streams', [])
+        return streams[0] if streams else None
     
-    def align_audio_video(self, audio_features: Dict, video_frames: List[np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
-        """Align audio features with video frames"""
+    def preprocess_video(self, video_path: str, video_info: Optional[Dict] = None) -> Iterator[np.ndarray]:
+        """Stream frames from video through an FFmpeg pipe, one frame at a time"""
+        for frame_block in self.read_video_batches(video_path, video_info):
+            yield from frame_block
+    
+    def read_video_batches(self, video_path: str, video_info: Optional[Dict] = None,
+                           block_pool: Optional[FrameBlockPool] = None) -> Iterator[np.ndarray]:
+        """Stream frames from an FFmpeg pipe as (n, H, W, 3) blocks of up to batch_size frames"""
+        video_info = video_info or self.probe_video(video_path)
+        width, height = video_info['width'], video_info['height']
+        frame_bytes = width * height * 3
+        
+        # bgr24 keeps frames in the channel order the OpenCV detector and writer expect
+        process = subprocess.Popen(
+            ['ffmpeg', '-v', 'error', '-noautorotate', '-i', video_path,
+             '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'],
+            stdout=subprocess.PIPE
+        )
+        try:
+            while True:
+                # Decode straight into a preallocated block instead of a bytes object per frame. Without a
+                # pool every block is new, since the caller may keep earlier frames around
+                if block_pool is None:
+                    frame_block = np.empty((self.batch_size, height, width, 3), np.uint8)
+                else:
+                    frame_block = block_pool.acquire()
+                    if frame_block is None:
+                        return
+                num_frames = self._read_into(process.stdout, frame_block) // frame_bytes
+                if num_frames == 0:
+                    break
+                yield frame_block[:num_frames]
+                if num_frames < self.batch_size:
+                    break
+        finally:
+            # Closing the pipe also stops FFmpeg if the consumer bails out early
+            process.stdout.close()
+            process.wait()
+        
+        # Only reached at the end of the stream; a consumer closing the generator early skips the check
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed with exit code {process.returncode} reading {video_path}")
+    
+    @staticmethod
+    def _read_into(stream, buffer: np.ndarray) -> int:
+        """Fill buffer from a binary stream, returning the number of bytes read before EOF"""
+        view = memoryview(buffer).cast('B')
+        total = 0
+        while total < len(view):
+            num_read = stream.readinto(view[total:])
+            if not num_read:
+                break
+            total += num_read
+        return total
+    
+    def align_audio_video(self, audio_features: Dict, video_frames: Iterable[np.ndarray],
+                          num_frames: Optional[int] = None) -> Tuple[torch.Tensor, Iterable[np.ndarray]]:
+        """Align audio features with video frames, given num_frames when streaming"""
+        target_frames = num_frames if num_frames is not None else len(video_frames)
         audio_length = audio_features['audio_length']
-        video_fps = len(video_frames) / audio_length
+        video_fps = target_frames / audio_length
         
         # Resample audio features to match video frame rate
         mel_spec = audio_features['mel_spectrogram']
-        target_frames = len(video_frames)
         
-        # Simple linear interpolation for alignment
-        aligned_audio = np.zeros((target_frames, mel_spec.shape[0]))
-        for i in range(target_frames):
-            audio_idx = int(i * mel_spec.shape[1] / target_frames)
-            audio_idx = min(audio_idx, mel_spec.shape[1] - 1)
-            aligned_audio[i] = mel_spec[:, audio_idx]
+        # Nearest-neighbour lookup of the mel column for every video frame in one gather
+        num_audio_frames = mel_spec.shape[1]
+        audio_idx = torch.arange(target_frames, device=mel_spec.device) * num_audio_frames // target_frames
+        audio_idx = audio_idx.clamp_(max=num_audio_frames - 1)
+        aligned_audio = mel_spec[:, audio_idx].T.contiguous()
         
         return aligned_audio, video_frames
     
@@ -238,64 +691,326 @@ class OmniSyncFramework:
         audio = self.audio_processor.load_audio(audio_path)
         audio_features = self.audio_processor.extract_audio_features(audio)
         
-        # Process video
-        video_frames = self.preprocess_video(video_path)
+        # Process video as a stream of batch_size frame blocks
+        video_info = self.probe_video(video_path)
+        # Frames are decoded into a fixed pool of blocks that the encode stage hands back once written
+        block_pool = FrameBlockPool(
+            self._pipeline_blocks(), (self.batch_size, video_info['height'], video_info['width'], 3)
+        )
+        video_batches = self.read_video_batches(video_path, video_info, block_pool)
         
         # Align audio and video
-        aligned_audio, aligned_frames = self.align_audio_video(audio_features, video_frames)
+        aligned_audio, aligned_batches = self.align_audio_video(
+            audio_features, video_batches, num_frames=video_info['frame_count']
+        )
         
-        print(f"Processing {len(aligned_frames)} frames...")
+        print(f"Processing {video_info['frame_count']} frames...")
         
-        # Generate lip-sync frames
-        output_frames = []
-        for i, frame in enumerate(aligned_frames):
-            # Detect face and extract lip region
-            face_bbox = self.face_detector.detect_face(frame)
-            
-            if face_bbox is None:
-                output_frames.append(frame)
+        # Compute guidance strength for every frame in one vectorized pass
+        audio_powers = aligned_audio.pow(2).mean(dim=1).cpu().numpy()
+        guidance_strengths = self.guidance_system.compute_guidance_strength(
+            audio_powers, np.arange(len(audio_powers)), len(audio_powers)
+        )
+        
+        # Decode, inference and encode run as overlapping producer/consumer stages
+        self.run_pipeline(
+            aligned_batches, aligned_audio, guidance_strengths, output_path,
+            fps=video_info['fps'], block_pool=block_pool
+        )
+        print(f"Lip-sync video saved to: {output_path}")
+    
+    def run_pipeline(self, frame_batches: Iterable[np.ndarray], aligned_audio: torch.Tensor,
+                     guidance_strengths: np.ndarray, output_path: str, fps: float = 25,
+                     block_pool: Optional[FrameBlockPool] = None):
+        """Run decode, lip-sync inference and encode over (n, H, W, 3) frame blocks as concurrent stages"""
+        # With a pool, its blocks bound the decoded frames in flight; the queues bound plain iterables
+        num_blocks = self._pipeline_blocks()
+        decode_queue = queue.Queue(maxsize=num_blocks)
+        encode_queue = queue.Queue(maxsize=num_blocks)
+        stop_event = threading.Event()
+        errors = []
+        
+        def run_stage(stage, output_queue=None):
+            try:
+                stage()
+            except BaseException as error:
+                errors.append(error)
+                stop_event.set()
+                if block_pool is not None:
+                    block_pool.close()
+            finally:
+                # None marks the end of the stream for the next stage
+                if output_queue is not None:
+                    self._queue_put(output_queue, None, stop_event)
+        
+        def decode_worker():
+            try:
+                for batch in frame_batches:
+                    if not self._queue_put(decode_queue, batch, stop_event):
+                        break
+            finally:
+                # Closing the generator runs its cleanup now, stopping FFmpeg even when a later stage failed
+                if hasattr(frame_batches, 'close'):
+                    frame_batches.close()
+        
+        def gpu_worker():
+            start_idx = 0
+            for batch in self._queue_drain(decode_queue, stop_event):
+                output_batch = self.lip_sync_batch(batch, start_idx, aligned_audio, guidance_strengths)
+                if not self._queue_put(encode_queue, output_batch, stop_event):
+                    break
+                start_idx += len(batch)
+        
+        def encode_worker():
+            # Finished blocks go straight to the encoder, never collected into a list of frames
+            blocks = self._queue_drain(encode_queue, stop_event)
+            if block_pool is not None:
+                # Written blocks go back to the decoder instead of being freed
+                blocks = block_pool.recycle(blocks)
+            self.save_video(blocks, output_path, fps=fps)
+        
+        workers = [
+            threading.Thread(target=run_stage, args=(decode_worker, decode_queue), daemon=True),
+            threading.Thread(target=run_stage, args=(encode_worker,), daemon=True)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        # The GPU stage stays on the calling thread, where the compiled model's CUDA graphs were captured
+        run_stage(gpu_worker, encode_queue)
+        
+        for worker in workers:
+            worker.join()
+        
+        if errors:
+            raise errors[0]
+    
+    def _pipeline_blocks(self) -> int:
+        """Number of batch_size frame blocks that fit in max_buffered_frames"""
+        return max(1, self.max_buffered_frames // self.batch_size)
+    
+    @staticmethod
+    def _queue_put(q: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """Put item on a bounded queue, giving up if another stage has failed"""
+        while not stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
                 continue
+        return False
+    
+    @staticmethod
+    def _queue_drain(q: queue.Queue, stop_event: threading.Event) -> Iterator:
+        """Yield items from a queue until the end-of-stream marker or a stage failure"""
+        while not stop_event.is_set():
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            yield item
+    
+    def lip_sync_batch(self, frames: np.ndarray, start_idx: int, aligned_audio: torch.Tensor,
+                       guidance_strengths: np.ndarray) -> np.ndarray:
+        """Generate lip-sync output in place for an (n, H, W, 3) block of consecutive frames from start_idx"""
+        total_frames = len(guidance_strengths)
+        
+        # Detect faces on keyframes in one DNN pass and interpolate the rest
+        face_bboxes = self.face_tracker.track(frames, start_idx)
+        
+        # Offsets within the block of every frame with a detected face
+        face_offsets = np.array(
+            [offset for offset, bbox in enumerate(face_bboxes) if bbox is not None], np.int64
+        )
+        
+        if len(face_offsets):
+            # The probed frame count can undershoot the decoded stream by a frame or two
+            face_indices = np.minimum(start_idx + face_offsets, total_frames - 1)
             
-            # Extract features
-            lip_region = self.face_detector.extract_lip_region(frame, face_bbox)
-            
-            # Prepare inputs for model
-            audio_input = torch.FloatTensor(aligned_audio[i]).unsqueeze(0)
-            
-            # Resize lip region for model input
-            lip_resized = cv2.resize(lip_region, (64, 64))
-            visual_input = torch.FloatTensor(lip_resized).permute(2, 0, 1).unsqueeze(0) / 255.0
+            # Prepare inputs for model as (N, 80) audio and (N, 3, 64, 64) visual tensors
+            audio_batch = aligned_audio[torch.from_numpy(face_indices).to(aligned_audio.device)]
+            batch_guidance = guidance_strengths[face_indices]
             
-            # Compute guidance strength
-            audio_power = np.mean(aligned_audio[i] ** 2)
-            guidance_strength = self.guidance_system.compute_guidance_strength(
-                audio_power, i, len(aligned_frames)
+            # Crop and resize every lip region for model input in one device call
+            lip_boxes = self.face_detector.lip_boxes(
+                np.array([face_bboxes[offset] for offset in face_offsets]), frames.shape[1:3]
             )
+            visual_batch = self.crop_lip_regions(frames, face_offsets, lip_boxes, size=64)
             
             # Generate lip-sync (simplified - in practice this would be more complex)
-            with torch.no_grad():
-                output_features = self.model(audio_input, visual_input)
+            output_features = self.run_model_batched(audio_batch, visual_batch)
+        
+        # For now, just return original frames (placeholder for actual synthesis into frames[i])
+        return frames
+    
+    def crop_lip_regions(self, frames: np.ndarray, frame_offsets: np.ndarray, lip_boxes: np.ndarray,
+                         size: int = 64) -> torch.Tensor:
+        """Crop and resize lip boxes from an (n, H, W, 3) block to a channels_last (N, 3, size, size) batch in [0, 1]"""
+        frame_h, frame_w = frames.shape[1:3]
+        
+        # Cut a window with a 1 px margin around each box on the host so bilinear taps at the box
+        # edges see the same neighbours as on the full frame; only these windows are uploaded
+        windows = np.empty_like(lip_boxes)
+        windows[:, :2] = np.maximum(lip_boxes[:, :2] - 1, 0)
+        windows[:, 2] = np.minimum(lip_boxes[:, 2] + 1, frame_w)
+        windows[:, 3] = np.minimum(lip_boxes[:, 3] + 1, frame_h)
+        max_h = max(int((windows[:, 3] - windows[:, 1]).max()), 1)
+        max_w = max(int((windows[:, 2] - windows[:, 0]).max()), 1)
+        
+        staging = self._staging_block((len(lip_boxes), max_h, max_w, 3))
+        for n, (frame_offset, (x1, y1, x2, y2)) in enumerate(zip(frame_offsets, windows)):
+            h, w = y2 - y1, x2 - x1
+            if h <= 0 or w <= 0:
+                staging[n] = 0
+                continue
             
-            # For now, just return original frame (placeholder for actual synthesis)
-            output_frames.append(frame)
+            staging[n, :h, :w] = frames[frame_offset, y1:y2, x1:x2]
+            # Replicate the last row/column into the padding so edge taps clamp as on the full frame
+            if h < max_h:
+                staging[n, h, :w] = staging[n, h - 1, :w]
+            if w < max_w:
+                staging[n, :min(h + 1, max_h), w] = staging[n, :min(h + 1, max_h), w - 1]
         
-        # Save output video
-        self.save_video(output_frames, output_path, fps=25)
-        print(f"Lip-sync video saved to: {output_path}")
+        windows_t = self._to_device_async(torch.from_numpy(staging))
+        if self.copy_stream is not None:
+            event = torch.cuda.Event()
+            event.record(self.copy_stream)
+            self.staging_events[self.staging_slot] = event
+        windows_t = windows_t.permute(0, 3, 1, 2).to(torch.float32, memory_format=torch.contiguous_format)
+        
+        # Rows of (window index, x1, y1, x2, y2) in window coordinates, kept in FP32 for exact pixel positions
+        boxes = np.empty((len(lip_boxes), 5), np.float32)
+        boxes[:, 0] = np.arange(len(lip_boxes))
+        boxes[:, 1::2] = lip_boxes[:, 0::2] - windows[:, :1]
+        boxes[:, 2::2] = lip_boxes[:, 1::2] - windows[:, 1:2]
+        boxes = self._to_device_async(torch.from_numpy(boxes))
+        
+        # roi_align crops and bilinearly resamples every box in one kernel
+        crops = roi_align(windows_t, boxes, output_size=(size, size), aligned=True)
+        return crops.contiguous(memory_format=torch.channels_last).mul_(1 / 255.0)
+    
+    def _staging_block(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Host uint8 buffer for an upload; on CUDA, the next slot of the pinned staging ring"""
+        if self.copy_stream is None:
+            return np.empty(shape, np.uint8)
+        
+        slot = self.staging_slot = (self.staging_slot + 1) % len(self.staging_buffers)
+        # Don't overwrite a slot whose previous upload is still in flight
+        if self.staging_events[slot] is not None:
+            self.staging_events[slot].synchronize()
+        
+        num_bytes = int(np.prod(shape))
+        buffer = self.staging_buffers[slot]
+        if buffer is None or buffer.numel() < num_bytes:
+            buffer = self.staging_buffers[slot] = torch.empty(num_bytes, dtype=torch.uint8, pin_memory=True)
+        return buffer[:num_bytes].numpy().reshape(shape)
+    
+    def run_model_batched(self, audio_batch: torch.Tensor, visual_batch: torch.Tensor) -> torch.Tensor:
+        """Run the model over stacked per-frame inputs, batch_size frames per forward pass"""
+        audio_batch = self._to_device_async(audio_batch)
+        visual_batch = self._to_device_async(visual_batch)
+        
+        outputs = []
+        with torch.inference_mode(), torch.autocast(
+            device_type=self.device.type, dtype=torch.float16, enabled=self.use_autocast
+        ):
+            for audio_chunk, visual_chunk in zip(
+                torch.split(audio_batch, self.batch_size),
+                torch.split(visual_batch, self.batch_size)
+            ):
+                # Pad the tail chunk so the compiled model never sees a new shape
+                num_valid = audio_chunk.shape[0]
+                padding = self.batch_size - num_valid
+                if padding > 0:
+                    audio_chunk = F.pad(audio_chunk, (0, 0, 0, padding))
+                    visual_chunk = F.pad(visual_chunk, (0, 0, 0, 0, 0, 0, 0, padding)).contiguous(
+                        memory_format=torch.channels_last
+                    )
+                
+                audio_chunk = audio_chunk.to(self.inference_dtype)
+                visual_chunk = visual_chunk.to(self.inference_dtype)
+                
+                # CUDA graph outputs are overwritten by the next replay, so copy them out
+                torch.compiler.cudagraph_mark_step_begin()
+                output = self.inference_model(audio_chunk, visual_chunk)
+                outputs.append(output[:num_valid].to(torch.float32, copy=True))
+        
+        return torch.cat(outputs)
+    
+    def _to_device_async(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Copy a host tensor to the device on the side copy stream"""
+        if self.copy_stream is None or tensor.device.type != 'cpu':
+            return tensor.to(self.device)
+        
+        # Page-locked host memory lets the copy run asynchronously
+        if not tensor.is_pinned():
+            tensor = tensor.pin_memory()
+        with torch.cuda.stream(self.copy_stream):
+            device_tensor = tensor.to(self.device, non_blocking=True)
+        
+        compute_stream = torch.cuda.current_stream()
+        compute_stream.wait_stream(self.copy_stream)
+        device_tensor.record_stream(compute_stream)
+        return device_tensor
     
-    def save_video(self, frames: List[np.ndarray], output_path: str, fps: int = 25):
-        """Save frames as video file"""
-        if not frames:
+    def save_video(self, frames: Iterable[np.ndarray], output_path: str, fps: float = 25):
+        """Save frames (or (n, H, W, 3) blocks of frames) as H.264 video by piping them to FFmpeg as they arrive"""
+        frames = iter(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
             return
         
-        height, width = frames[0].shape[:2]
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        # NVENC moves encoding onto the GPU; libx264 is the CPU fallback
+        if self._nvenc_available():
+            codec_args = ['-c:v', 'h264_nvenc', '-preset', 'p4']
+        else:
+            codec_args = ['-c:v', 'libx264', '-preset', 'veryfast']
         
-        for frame in frames:
-            out.write(frame)
+        height, width = first_frame.shape[-3:-1]
+        process = subprocess.Popen(
+            ['ffmpeg', '-y', '-v', 'error',
+             '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+             # yuv420p needs even dimensions, so drop a trailing odd row/column
+             '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2',
+             *codec_args, '-pix_fmt', 'yuv420p', output_path],
+            stdin=subprocess.PIPE
+        )
+        broken_pipe = False
+        try:
+            try:
+                for frame in itertools.chain([first_frame], frames):
+                    process.stdin.write(np.ascontiguousarray(frame).data)
+            finally:
+                process.stdin.close()
+        except BrokenPipeError:
+            # FFmpeg exited early; report its exit status below instead
+            broken_pipe = True
+        finally:
+            process.wait()
+        
+        if process.returncode != 0 or broken_pipe:
+            raise RuntimeError(f"ffmpeg failed with exit code {process.returncode} writing {output_path}")
+    
+    def _nvenc_available(self) -> bool:
+        """Check once, with a real one-frame encode, whether NVENC works on this machine"""
+        if self.device.type != 'cuda':
+            return False
         
-        out.release()
+        # Listing h264_nvenc in `ffmpeg -encoders` is not enough: containers without
+        # libnvidia-encode only fail once encoding starts
+        if self.nvenc_works is None:
+            try:
+                result = subprocess.run(
+                    ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'nullsrc=s=256x256:d=0.04',
+                     '-frames:v', '1', '-c:v', 'h264_nvenc', '-pix_fmt', 'yuv420p', '-f', 'null', '-'],
+                    capture_output=True, timeout=30
+                )
+                self.nvenc_works = result.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                self.nvenc_works = False
+        return self.nvenc_works
     
     def train_model(self, training_data_path: str, epochs: int = 100):
         """Train the lip-sync model (simplified training loop)"""
@@ -314,6 +1029,9 @@ class OmniSyncFramework:
             # Backward pass
             # Update weights
             pass
+        
+        # Rebuild (and re-export) the inference model for the trained weights
+        self._build_inference_model()
 
 # Example usage and testing
 def main():
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import omnisync_framework straight from the Python/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+"""Tests for KeyframeFaceTracker with a stub detector standing in for the DNN"""
+import numpy as np
+import pytest
+
+omnisync_framework = pytest.importorskip('omnisync_framework')
+KeyframeFaceTracker = omnisync_framework.KeyframeFaceTracker
+
+
+class StubDetector:
+    """Look up a bbox by frame index, which each test frame stores in its pixel values"""
+    
+    def __init__(self, bboxes):
+        self.bboxes = bboxes
+        self.calls = []
+    
+    def detect_faces_batch(self, frames, batch_size=32):
+        indices = [int(frame[0, 0, 0]) for frame in frames]
+        self.calls.append(indices)
+        return [self.bboxes.get(idx) for idx in indices]
+
+
+def make_frames(start, stop):
+    """(n, H, W, 3) block whose frame i is filled with the value start + i"""
+    return np.stack([np.full((8, 8, 3), idx, np.uint8) for idx in range(start, stop)])
+
+
+def make_tracker(detector):
+    # A threshold above any uint8 difference keeps keyframe selection on the fixed interval
+    return KeyframeFaceTracker(detector, keyframe_interval=5, diff_threshold=256.0)
+
+
+def test_interpolation_carries_over_between_batches():
+    detector = StubDetector({idx: (10 * idx, 0, 20, 20) for idx in range(8)})
+    tracker = make_tracker(detector)
+    
+    first = tracker.track(make_frames(0, 4), 0)
+    second = tracker.track(make_frames(4, 8), 4)
+    
+    # Frame 4 is interpolated between the last anchor of the first batch (3) and keyframe 5
+    assert detector.calls == [[0, 3], [5, 7]]
+    assert first + second == [(10 * idx, 0, 20, 20) for idx in range(8)]
+
+
+def test_missing_face_reuses_nearest_keyframe():
+    face_a, face_b = (0, 0, 20, 20), (100, 0, 20, 20)
+    detector = StubDetector({0: face_a, 10: face_b})
+    tracker = make_tracker(detector)
+    
+    bboxes = tracker.track(make_frames(0, 11), 0)
+    
+    assert detector.calls == [[0, 5, 10]]
+    assert bboxes == [face_a] * 3 + [None] * 5 + [face_b] * 3
+
+
+def test_restart_at_zero_resets_tracking():
+    detector = StubDetector({idx: (idx, 0, 20, 20) for idx in range(8)})
+    tracker = make_tracker(detector)
+    tracker.track(make_frames(0, 8), 0)
+    
+    # A new video starts at frame 0 again; nothing from the first run may leak into it
+    detector.bboxes = {0: (50, 50, 20, 20), 3: (80, 50, 20, 20)}
+    detector.calls.clear()
+    bboxes = tracker.track(make_frames(0, 4), 0)
+    
+    assert detector.calls == [[0, 3]]
+    assert bboxes == [(50 + 10 * idx, 50, 20, 20) for idx in range(4)]
+    assert tracker.next_frame_idx == 4